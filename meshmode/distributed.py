@@ -180,8 +180,10 @@ def make_remote_group_infos(
                 bdry_elem_indices=np.concatenate([
                     actx.to_numpy(batch.to_element_indices)
                     for batch in bdry_conn.groups[igrp].batches]),
-                bdry_faces=np.concatenate(
-                    [np.full(batch.nelements, batch.to_element_face)
+                bdry_faces=np.repeat(
+                    [batch.to_element_face
+                        for batch in bdry_conn.groups[igrp].batches],
+                    [batch.nelements
                         for batch in bdry_conn.groups[igrp].batches]))
             for igrp in range(len(bdry_conn.from_discr.groups))]
 
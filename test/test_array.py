@@ -25,8 +25,8 @@ import pytest
 import numpy as np
 
 from meshmode import _acf  # noqa: F401
-from meshmode.array_context import (PytestPyOpenCLArrayContextFactory,
-                                    PytestPytatoPyOpenCLArrayContextFactory)
+from testlib import (PytestPyOpenCLArrayContextFactory,
+                     PytestPytatoPyOpenCLArrayContextFactory)
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPytatoPyOpenCLArrayContextFactory,
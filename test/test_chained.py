@@ -23,7 +23,7 @@ THE SOFTWARE.
 import numpy as np
 
 import pytest
-from meshmode.array_context import PytestPyOpenCLArrayContextFactory
+from testlib import PytestPyOpenCLArrayContextFactory
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPyOpenCLArrayContextFactory])
@@ -26,7 +26,7 @@ import numpy.linalg as la  # noqa: F401
 
 import meshmode         # noqa: F401
 
-from meshmode.array_context import PytestPyOpenCLArrayContextFactory
+from testlib import PytestPyOpenCLArrayContextFactory
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPyOpenCLArrayContextFactory])
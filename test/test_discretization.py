@@ -30,7 +30,7 @@ from meshmode.discretization.poly_element import (
         InterpolatoryQuadratureSimplexGroupFactory,
         )
 
-from meshmode.array_context import PytestPyOpenCLArrayContextFactory
+from testlib import PytestPyOpenCLArrayContextFactory
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPyOpenCLArrayContextFactory])
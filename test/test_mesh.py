@@ -29,7 +29,7 @@ import numpy.linalg as la
 import pytest
 
 from meshmode import _acf       # noqa: F401
-from meshmode.array_context import PytestPyOpenCLArrayContextFactory
+from testlib import PytestPyOpenCLArrayContextFactory
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPyOpenCLArrayContextFactory])
@@ -49,6 +49,7 @@ import meshmode.mesh.io as mio
 from meshmode.mesh.tools import AffineMap
 import modepy as mp
 
+from testlib import cached_generate_gmsh_mesh
 
 import logging
 logger = logging.getLogger(__name__)
@@ -503,18 +504,11 @@ def test_quad_single_element(visualize=False):
     TensorProductElementGroup
     ])
 def test_merge_and_map(actx_factory, group_cls, visualize=False):
-    from meshmode.mesh.io import generate_gmsh, FileSource
-
     order = 3
     mesh_order = 3
 
     if group_cls is SimplexElementGroup:
-        mesh = generate_gmsh(
-                FileSource("blob-2d.step"), 2, order=mesh_order,
-                force_ambient_dim=2,
-                other_options=["-string", "Mesh.CharacteristicLengthMax = 0.02;"],
-                target_unit="MM",
-                )
+        mesh = cached_generate_gmsh_mesh("blob-2d.step", 2, mesh_order, 0.02)
 
         discr_grp_factory = default_simplex_group_factory(base_dim=2, order=order)
     else:
@@ -551,16 +545,9 @@ def test_merge_and_map(actx_factory, group_cls, visualize=False):
 # {{{ element orientation
 
 def test_element_orientation_via_flipping():
-    from meshmode.mesh.io import generate_gmsh, FileSource
-
     mesh_order = 3
 
-    mesh = generate_gmsh(
-            FileSource("blob-2d.step"), 2, order=mesh_order,
-            force_ambient_dim=2,
-            other_options=["-string", "Mesh.CharacteristicLengthMax = 0.02;"],
-            target_unit="MM",
-            )
+    mesh = cached_generate_gmsh_mesh("blob-2d.step", 2, mesh_order, 0.02)
 
     from meshmode.mesh.processing import (perform_flips,
             find_volume_mesh_element_orientations)
@@ -568,10 +555,9 @@ def test_element_orientation_via_flipping():
 
     assert (mesh_orient > 0).all()
 
-    from random import randrange
+    rng = np.random.default_rng(seed=0)
     flippy = np.zeros(mesh.nelements, np.int8)
-    for _ in range(int(0.3*mesh.nelements)):
-        flippy[randrange(0, mesh.nelements)] = 1
+    flippy[rng.integers(0, mesh.nelements, size=int(0.3*mesh.nelements))] = 1
 
     mesh = perform_flips(mesh, flippy, skip_tests=True)
 
@@ -772,8 +758,8 @@ def test_lookup_tree(visualize=False):
 
     extent = bbox_max-bbox_min
 
-    for _ in range(20):
-        pt = bbox_min + np.random.rand(2) * extent
+    rng = np.random.default_rng(seed=0)
+    for pt in bbox_min + rng.random((20, 2)) * extent:
         print(pt)
         for igrp, iel in tree.generate_matches(pt):
             print(igrp, iel)
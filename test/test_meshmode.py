@@ -23,13 +23,12 @@ THE SOFTWARE.
 from functools import partial
 
 import numpy as np
-import numpy.linalg as la
 
 import meshmode         # noqa: F401
 from arraycontext import flatten
 
-from meshmode.array_context import (PytestPyOpenCLArrayContextFactory,
-                                    PytestPytatoPyOpenCLArrayContextFactory)
+from testlib import (PytestPyOpenCLArrayContextFactory,
+                     PytestPytatoPyOpenCLArrayContextFactory)
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPytatoPyOpenCLArrayContextFactory,
@@ -52,12 +51,25 @@ from meshmode.discretization.connection import \
         FACE_RESTR_ALL, FACE_RESTR_INTERIOR
 import meshmode.mesh.generation as mgen
 
+from testlib import generate_gmsh_mesh, cached_generate_gmsh_mesh
+
 import pytest
 
 import logging
 logger = logging.getLogger(__name__)
 
 
+# Exact reference values used by the sanity checks below:
+# - simplex_vol, cube_vol: volume of the biunit simplex and cube,
+# - ball_surf, ball_vol: surface area and volume of the unit ball.
+_DIM_CONSTANTS = {
+        2: dict(simplex_vol=2.0, cube_vol=4.0,
+                ball_surf=2*np.pi, ball_vol=np.pi),
+        3: dict(simplex_vol=4/3, cube_vol=8.0,
+                ball_surf=4*np.pi, ball_vol=4*np.pi/3),
+        }
+
+
 def normalize_group_factory(dim, grp_factory):
     if grp_factory == "warp_and_blend":
         return {
@@ -120,6 +132,7 @@ def test_boundary_interpolation(actx_factory, group_factory, boundary_tag,
     eoc_rec = EOCRecorder()
 
     order = 4
+    grp_factory = group_factory(order)
 
     def f(x):
         return 0.1*actx.np.sin(30*x)
@@ -162,7 +175,7 @@ def test_boundary_interpolation(actx_factory, group_factory, boundary_tag,
 
         # }}}
 
-        vol_discr = Discretization(actx, mesh, group_factory(order))
+        vol_discr = Discretization(actx, mesh, grp_factory)
         print("h=%s -> %d elements" % (
                 h, sum(mgrp.nelements for mgrp in mesh.groups)))
 
@@ -170,7 +183,7 @@ def test_boundary_interpolation(actx_factory, group_factory, boundary_tag,
         vol_f = f(x)
 
         bdry_connection = make_face_restriction(
-                actx, vol_discr, group_factory(order),
+                actx, vol_discr, grp_factory,
                 boundary_tag, per_face_groups=per_face_groups)
         check_connection(actx, bdry_connection)
         bdry_discr = bdry_connection.to_discr
@@ -182,14 +195,18 @@ def test_boundary_interpolation(actx_factory, group_factory, boundary_tag,
         if mesh_name == "blob" and dim == 2 and mesh.nelements < 500:
             from meshmode.discretization.connection.direct import \
                     make_direct_full_resample_matrix
-            mat = actx.to_numpy(
-                    make_direct_full_resample_matrix(actx, bdry_connection))
-            bdry_f_2_by_mat = mat.dot(actx.to_numpy(flatten(vol_f, actx)))
+            from meshmode.transform_metadata import FirstAxisIsElementsTag
+            mat = make_direct_full_resample_matrix(actx, bdry_connection)
+            bdry_f_2_by_mat = actx.einsum("ij,j->i", mat, flatten(vol_f, actx),
+                    tagged=(FirstAxisIsElementsTag(),))
 
-            mat_error = la.norm(
-                    actx.to_numpy(flatten(bdry_f_2, actx)) - bdry_f_2_by_mat)
+            mat_error = actx.to_numpy(actx.np.linalg.norm(
+                    flatten(bdry_f_2, actx) - bdry_f_2_by_mat))
             assert mat_error < 1e-14, mat_error
 
+            # free the dense matrix before the next (finer) one is built
+            del mat
+
         err = flat_norm(bdry_f-bdry_f_2, np.inf)
         eoc_rec.add_data_point(h, actx.to_numpy(err))
 
@@ -240,6 +257,7 @@ def test_all_faces_interpolation(actx_factory, group_factory,
     eoc_rec = EOCRecorder()
 
     order = 4
+    grp_factory = group_factory(order)
 
     def f(x):
         return 0.1*actx.np.sin(30*x)
@@ -252,16 +270,7 @@ def test_all_faces_interpolation(actx_factory, group_factory,
 
             h = mesh_par
 
-            from meshmode.mesh.io import generate_gmsh, FileSource
-            print("BEGIN GEN")
-            mesh = generate_gmsh(
-                    FileSource("blob-2d.step"), 2, order=order,
-                    force_ambient_dim=2,
-                    other_options=[
-                        "-string", "Mesh.CharacteristicLengthMax = %s;" % h],
-                    target_unit="MM",
-                    )
-            print("END GEN")
+            mesh = cached_generate_gmsh_mesh("blob-2d.step", 2, order, h)
         elif mesh_name == "warp":
             mesh = mgen.generate_warped_rect_mesh(dim, order=4,
                     nelements_side=mesh_par, group_cls=group_cls)
@@ -272,20 +281,21 @@ def test_all_faces_interpolation(actx_factory, group_factory,
 
         # }}}
 
-        vol_discr = Discretization(actx, mesh, group_factory(order))
+        vol_discr = Discretization(actx, mesh, grp_factory)
         print("h=%s -> %d elements" % (
                 h, sum(mgrp.nelements for mgrp in mesh.groups)))
 
         all_face_bdry_connection = make_face_restriction(
-                actx, vol_discr, group_factory(order),
+                actx, vol_discr, grp_factory,
                 FACE_RESTR_ALL, per_face_groups=per_face_groups)
         all_face_bdry_discr = all_face_bdry_connection.to_discr
 
+        all_element_indices = np.arange(vol_discr.mesh.nelements)
         for ito_grp, ceg in enumerate(all_face_bdry_connection.groups):
             for ibatch, batch in enumerate(ceg.batches):
                 assert np.array_equal(
-                        actx.to_numpy(actx.thaw(batch.from_element_indices)),
-                        np.arange(vol_discr.mesh.nelements))
+                        actx.to_numpy(batch.from_element_indices),
+                        all_element_indices)
 
                 if per_face_groups:
                     assert ito_grp == batch.to_element_face
@@ -302,7 +312,7 @@ def test_all_faces_interpolation(actx_factory, group_factory,
                 FACE_RESTR_INTERIOR,
                 ]:
             bdry_connection = make_face_restriction(
-                    actx, vol_discr, group_factory(order),
+                    actx, vol_discr, grp_factory,
                     boundary_tag, per_face_groups=per_face_groups)
             bdry_discr = bdry_connection.to_discr
 
@@ -367,6 +377,7 @@ def test_opposite_face_interpolation(actx_factory, group_factory,
     eoc_rec = EOCRecorder()
 
     order = 5
+    grp_factory = group_factory(order)
 
     def f(x):
         return 0.1*actx.np.sin(30*x)
@@ -387,16 +398,7 @@ def test_opposite_face_interpolation(actx_factory, group_factory,
 
             h = mesh_par
 
-            from meshmode.mesh.io import generate_gmsh, FileSource
-            print("BEGIN GEN")
-            mesh = generate_gmsh(
-                    FileSource("blob-2d.step"), 2, order=order,
-                    force_ambient_dim=2,
-                    other_options=[
-                        "-string", "Mesh.CharacteristicLengthMax = %s;" % h],
-                    target_unit="MM",
-                    )
-            print("END GEN")
+            mesh = cached_generate_gmsh_mesh("blob-2d.step", 2, order, h)
         elif mesh_name == "warp":
             mesh = mgen.generate_warped_rect_mesh(dim, order=order,
                     nelements_side=mesh_par, group_cls=group_cls)
@@ -423,12 +425,12 @@ def test_opposite_face_interpolation(actx_factory, group_factory,
 
         # }}}
 
-        vol_discr = Discretization(actx, mesh, group_factory(order))
+        vol_discr = Discretization(actx, mesh, grp_factory)
         print("h=%s -> %d elements" % (
                 h, sum(mgrp.nelements for mgrp in mesh.groups)))
 
         bdry_connection = make_face_restriction(
-                actx, vol_discr, group_factory(order),
+                actx, vol_discr, grp_factory,
                 FACE_RESTR_INTERIOR)
         bdry_discr = bdry_connection.to_discr
 
@@ -566,10 +568,9 @@ def test_sanity_single_element(actx_factory, dim, mesh_order, group_cls,
     # {{{ volume calculation check
 
     if isinstance(mg, SimplexElementGroup):
-        from pytools import factorial
-        true_vol = 1/factorial(dim) * 2**dim
+        true_vol = _DIM_CONSTANTS[dim]["simplex_vol"]
     elif isinstance(mg, TensorProductElementGroup):
-        true_vol = 2**dim
+        true_vol = _DIM_CONSTANTS[dim]["cube_vol"]
     else:
         raise TypeError
 
@@ -760,90 +761,110 @@ def test_sanity_balls(actx_factory, src_file, dim, mesh_order, visualize=False):
 
     # overkill
     quad_order = mesh_order
+    grp_factory = InterpolatoryQuadratureSimplexGroupFactory(quad_order)
 
     from pytential import bind, sym
 
-    for h in [0.2, 0.1, 0.05]:
-        from meshmode.mesh.io import generate_gmsh, FileSource
-        mesh = generate_gmsh(
-                FileSource(src_file), dim, order=mesh_order,
-                other_options=["-string", "Mesh.CharacteristicLengthMax = %g;" % h],
-                force_ambient_dim=dim,
-                target_unit="MM")
+    hs = [0.2, 0.1, 0.05]
 
-        logger.info("%d elements", mesh.nelements)
+    # gmsh runs in a subprocess, so the meshes can be generated concurrently
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=len(hs)) as executor:
+        meshes = list(executor.map(
+            partial(generate_gmsh_mesh, src_file, dim, mesh_order), hs))
 
-        # {{{ discretizations and connections
+    for h, mesh in zip(hs, meshes):
+        logger.info("h=%g: %d elements", h, mesh.nelements)
 
-        from meshmode.discretization import Discretization
-        vol_discr = Discretization(actx, mesh,
-                InterpolatoryQuadratureSimplexGroupFactory(quad_order))
+    # {{{ discretizations and connections
 
-        from meshmode.discretization.connection import make_face_restriction
-        bdry_connection = make_face_restriction(
-                actx,
-                vol_discr,
-                InterpolatoryQuadratureSimplexGroupFactory(quad_order),
-                BTAG_ALL)
-        bdry_discr = bdry_connection.to_discr
+    # All the refinement levels go into a single multi-group discretization,
+    # so that each of the operations below is done once for all of them.
+    from meshmode.mesh.processing import merge_disjoint_meshes
+    mesh = merge_disjoint_meshes(meshes)
+    level_group_starts = np.cumsum([0] + [len(m.groups) for m in meshes])
 
-        # }}}
+    from meshmode.discretization import Discretization
+    vol_discr = Discretization(actx, mesh, grp_factory)
 
-        from math import gamma
-        true_surf = 2*np.pi**(dim/2)/gamma(dim/2)
-        true_vol = true_surf/dim
+    from meshmode.discretization.connection import make_face_restriction
+    bdry_connection = make_face_restriction(
+            actx,
+            vol_discr,
+            grp_factory,
+            BTAG_ALL)
+    bdry_discr = bdry_connection.to_discr
 
-        vol_x = actx.thaw(vol_discr.nodes())
+    # }}}
 
-        vol_one = vol_x[0]*0 + 1
-        from pytential import norm, integral  # noqa
+    true_surf = _DIM_CONSTANTS[dim]["ball_surf"]
+    true_vol = _DIM_CONSTANTS[dim]["ball_vol"]
 
-        comp_vol = actx.to_numpy(integral(vol_discr, vol_one))
-        rel_vol_err = abs(true_vol - comp_vol) / true_vol
-        vol_eoc_rec.add_data_point(h, rel_vol_err)
-        print("VOL", true_vol, comp_vol)
+    vol_x = actx.thaw(vol_discr.nodes())
+
+    vol_one = vol_x[0]*0 + 1
+    from pytential import norm
 
-        bdry_x = actx.thaw(bdry_discr.nodes())
+    bdry_x = actx.thaw(bdry_discr.nodes())
 
-        bdry_one_exact = bdry_x[0] * 0 + 1
+    bdry_one_exact = bdry_x[0] * 0 + 1
 
-        bdry_one = bdry_connection(vol_one)
-        intp_err = norm(bdry_discr, bdry_one-bdry_one_exact)
-        assert intp_err < 1e-14
+    bdry_one = bdry_connection(vol_one)
+    intp_err = norm(bdry_discr, bdry_one-bdry_one_exact)
+    assert intp_err < 1e-14
 
-        comp_surf = actx.to_numpy(integral(bdry_discr, bdry_one))
+    # NOTE: the boundary has one group per volume group, so the group ranges
+    # of each refinement level are the same in both discretizations
+    vol_weights = bind(vol_discr,
+            sym.weights_and_area_elements(dim, dim))(actx)
+    bdry_weights = bind(bdry_discr,
+            sym.weights_and_area_elements(dim, dim - 1))(actx)
+
+    def level_integral(weights, ary, ilevel):
+        return actx.to_numpy(sum(
+            actx.np.sum(weights[igrp] * ary[igrp])
+            for igrp in range(
+                level_group_starts[ilevel], level_group_starts[ilevel + 1])))
+
+    for ilevel, h in enumerate(hs):
+        comp_vol = level_integral(vol_weights, vol_one, ilevel)
+        rel_vol_err = abs(true_vol - comp_vol) / true_vol
+        vol_eoc_rec.add_data_point(h, rel_vol_err)
+        print("VOL", true_vol, comp_vol)
+
+        comp_surf = level_integral(bdry_weights, bdry_one, ilevel)
         rel_surf_err = abs(true_surf - comp_surf) / true_surf
         surf_eoc_rec.add_data_point(h, rel_surf_err)
         print("SURF", true_surf, comp_surf)
 
-        if visualize:
-            from meshmode.discretization.visualization import make_visualizer
-            vol_vis = make_visualizer(actx, vol_discr, 7)
-            bdry_vis = make_visualizer(actx, bdry_discr, 7)
+    if visualize:
+        from meshmode.discretization.visualization import make_visualizer
+        vol_vis = make_visualizer(actx, vol_discr, 7)
+        bdry_vis = make_visualizer(actx, bdry_discr, 7)
 
-            name = src_file.split("-")[0]
-            vol_vis.write_vtk_file(f"sanity_balls_volume_{name}_{h:g}.vtu", [
-                ("f", vol_one),
-                ("area_el", bind(
-                    vol_discr,
-                    sym.area_element(mesh.ambient_dim, mesh.ambient_dim))
-                    (actx)),
-                ])
+        name = src_file.split("-")[0]
+        vol_vis.write_vtk_file(f"sanity_balls_volume_{name}.vtu", [
+            ("f", vol_one),
+            ("area_el", bind(
+                vol_discr,
+                sym.area_element(mesh.ambient_dim, mesh.ambient_dim))
+                (actx)),
+            ])
 
-            bdry_vis.write_vtk_file(f"sanity_balls_boundary_{name}_{h:g}.vtu", [
-                ("f", bdry_one)
-                ])
+        bdry_vis.write_vtk_file(f"sanity_balls_boundary_{name}.vtu", [
+            ("f", bdry_one)
+            ])
 
-        # {{{ check normals point outward
+    # {{{ check normals point outward
 
-        normal_outward_check = bind(bdry_discr,
-                sym.normal(mesh.ambient_dim) | sym.nodes(mesh.ambient_dim),
-                )(actx).as_scalar()
+    normal_outward_check = bind(bdry_discr,
+            sym.normal(mesh.ambient_dim) | sym.nodes(mesh.ambient_dim),
+            )(actx).as_scalar()
 
-        normal_outward_check = actx.to_numpy(flatten(normal_outward_check > 0, actx))
-        assert normal_outward_check.all(), normal_outward_check
+    normal_outward_check = actx.to_numpy(flatten(normal_outward_check > 0, actx))
+    assert normal_outward_check.all(), normal_outward_check
 
-        # }}}
+    # }}}
 
     print("---------------------------------")
     print("VOLUME")
@@ -24,7 +24,7 @@ THE SOFTWARE.
 from functools import partial
 import numpy as np
 
-from meshmode.array_context import PytestPyOpenCLArrayContextFactory
+from testlib import PytestPyOpenCLArrayContextFactory
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPyOpenCLArrayContextFactory])
@@ -253,6 +253,9 @@ def test_modal_truncation(actx_factory, nodal_group_factory,
     from pytools.convergence import EOCRecorder
     eoc_rec = EOCRecorder()
 
+    nodal_grp_factory = nodal_group_factory(order)
+    modal_grp_factory = modal_group_factory(order)
+
     def f(x):
         return actx.np.sin(2*x)
 
@@ -265,8 +268,8 @@ def test_modal_truncation(actx_factory, nodal_group_factory,
         h = 1/mesh_par
 
         # Make discretizations
-        nodal_disc = Discretization(actx, mesh, nodal_group_factory(order))
-        modal_disc = Discretization(actx, mesh, modal_group_factory(order))
+        nodal_disc = Discretization(actx, mesh, nodal_grp_factory)
+        modal_disc = Discretization(actx, mesh, modal_grp_factory)
 
         # Make connections (nodal -> modal)
         nodal_to_modal_conn = NodalToModalDiscretizationConnection(
@@ -29,7 +29,7 @@ import pyopencl as cl
 from meshmode.dof_array import flat_norm
 
 from arraycontext import flatten, unflatten
-from meshmode.array_context import PytestPyOpenCLArrayContextFactory
+from testlib import PytestPyOpenCLArrayContextFactory
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPyOpenCLArrayContextFactory])
@@ -485,43 +485,49 @@ def _test_data_transfer(mpi_comm, actx, local_bdry_conns,
     #     6. Receive local points from remote rank.
     #     7. Check if local points are the same as the original local points.
 
+    # Receives are posted up front (with buffers sized from the local
+    # connections), so that the communication overlaps with the computation
+    # of the data to be sent.
+
+    # 3.
+    remote_to_local_f_data = {
+            i_remote_part: np.empty(
+                remote_to_local_bdry_conns[i_remote_part].from_discr.ndofs,
+                dtype=remote_to_local_bdry_conns[i_remote_part]
+                .from_discr.real_dtype)
+            for i_remote_part in connected_parts}
+    recv_reqs = [
+            mpi_comm.Irecv(buf, source=i_remote_part, tag=TAG_SEND_REMOTE_NODES)
+            for i_remote_part, buf in remote_to_local_f_data.items()]
+
     # 1.
+    true_local_f = {}
     send_reqs = []
     for i_remote_part in connected_parts:
         conn = remote_to_local_bdry_conns[i_remote_part]
         bdry_discr = local_bdry_conns[i_remote_part].to_discr
         bdry_x = actx.thaw(bdry_discr.nodes()[0])
 
-        true_local_f = f(bdry_x)
-        remote_f = conn(true_local_f)
+        true_local_f[i_remote_part] = f(bdry_x)
+        remote_f = conn(true_local_f[i_remote_part])
 
         # 2.
-        send_reqs.append(mpi_comm.isend(
+        send_reqs.append(mpi_comm.Isend(
             actx.to_numpy(flatten(remote_f, actx)),
             dest=i_remote_part,
             tag=TAG_SEND_REMOTE_NODES))
 
-    # 3.
-    buffers = {}
-    for i_remote_part in connected_parts:
-        status = MPI.Status()
-        mpi_comm.probe(source=i_remote_part,
-                       tag=TAG_SEND_REMOTE_NODES,
-                       status=status)
-        buffers[i_remote_part] = np.empty(status.count, dtype=bytes)
-
-    recv_reqs = {}
-    for i_remote_part, buf in buffers.items():
-        recv_reqs[i_remote_part] = mpi_comm.irecv(buf=buf,
-                                                  source=i_remote_part,
-                                                  tag=TAG_SEND_REMOTE_NODES)
-    remote_to_local_f_data = {}
-    for i_remote_part, req in recv_reqs.items():
-        remote_to_local_f_data[i_remote_part] = req.wait()
-        buffers[i_remote_part] = None   # free buffer
-
-    for req in send_reqs:
-        req.wait()
+    MPI.Request.Waitall(recv_reqs + send_reqs)
+
+    # 6.
+    local_f_data = {
+            i_remote_part: np.empty(
+                local_bdry_conns[i_remote_part].to_discr.ndofs,
+                dtype=local_bdry_conns[i_remote_part].to_discr.real_dtype)
+            for i_remote_part in connected_parts}
+    recv_reqs = [
+            mpi_comm.Irecv(buf, source=i_remote_part, tag=TAG_SEND_LOCAL_NODES)
+            for i_remote_part, buf in local_f_data.items()]
 
     # 4.
     send_reqs = []
@@ -535,42 +541,20 @@ def _test_data_transfer(mpi_comm, actx, local_bdry_conns,
         remote_f = actx.to_numpy(flatten(conn(local_f), actx))
 
         # 5.
-        send_reqs.append(mpi_comm.isend(remote_f,
+        send_reqs.append(mpi_comm.Isend(remote_f,
                                         dest=i_remote_part,
                                         tag=TAG_SEND_LOCAL_NODES))
 
-    # 6.
-    buffers = {}
-    for i_remote_part in connected_parts:
-        status = MPI.Status()
-        mpi_comm.probe(source=i_remote_part,
-                       tag=TAG_SEND_LOCAL_NODES,
-                       status=status)
-        buffers[i_remote_part] = np.empty(status.count, dtype=bytes)
-
-    recv_reqs = {}
-    for i_remote_part, buf in buffers.items():
-        recv_reqs[i_remote_part] = mpi_comm.irecv(buf=buf,
-                                                  source=i_remote_part,
-                                                  tag=TAG_SEND_LOCAL_NODES)
-    local_f_data = {}
-    for i_remote_part, req in recv_reqs.items():
-        local_f_data[i_remote_part] = req.wait()
-        buffers[i_remote_part] = None   # free buffer
-
-    for req in send_reqs:
-        req.wait()
+    MPI.Request.Waitall(recv_reqs + send_reqs)
 
     # 7.
     for i_remote_part in connected_parts:
-        bdry_discr = local_bdry_conns[i_remote_part].to_discr
-        bdry_x = actx.thaw(bdry_discr.nodes()[0])
-
-        true_local_f = actx.to_numpy(flatten(f(bdry_x), actx))
         local_f = local_f_data[i_remote_part]
 
         from numpy.linalg import norm
-        err = norm(true_local_f - local_f, np.inf)
+        err = norm(
+                actx.to_numpy(flatten(true_local_f[i_remote_part], actx))
+                - local_f, np.inf)
         assert err < 1e-11, "Error = %f is too large" % err
 
 # }}}
@@ -596,6 +580,8 @@ def test_mpi_communication(num_parts, order):
 
         # https://mpi4py.readthedocs.io/en/stable/mpi4py.run.html
         sys.executable, "-m", "mpi4py.run", __file__],
+        # makes the test-local helpers (testlib) importable in the ranks
+        cwd=os.path.dirname(os.path.abspath(__file__)),
         )
 
 # }}}
@@ -26,7 +26,7 @@ from functools import partial
 import numpy as np
 import pytest
 
-from meshmode.array_context import PytestPyOpenCLArrayContextFactory
+from testlib import PytestPyOpenCLArrayContextFactory
 from arraycontext import pytest_generate_tests_for_array_contexts
 pytest_generate_tests = pytest_generate_tests_for_array_contexts(
         [PytestPyOpenCLArrayContextFactory])
@@ -135,6 +135,7 @@ def test_refinement_connection(
 
     # discretization order
     order = 5
+    grp_factory = group_factory(order)
 
     from meshmode.discretization import Discretization
     from meshmode.discretization.connection import (
@@ -188,14 +189,14 @@ def test_refinement_connection(
 
             return result
 
-        discr = Discretization(actx, mesh, group_factory(order))
+        discr = Discretization(actx, mesh, grp_factory)
 
         refiner = RefinerWithoutAdjacency(mesh)
         flags = refine_flags(mesh)
         refiner.refine(flags)
 
         connection = make_refinement_connection(
-            actx, refiner, discr, group_factory(order))
+            actx, refiner, discr, grp_factory)
         check_connection(actx, connection)
 
         fine_discr = connection.to_discr
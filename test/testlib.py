@@ -0,0 +1,94 @@
+__copyright__ = "Copyright (C) 2022 University of Illinois Board of Trustees"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+"""Helpers shared between the test modules in this directory."""
+
+from functools import lru_cache
+
+from meshmode import array_context as _mactx
+
+
+# {{{ array context factories
+
+# Test-only variants of the factories in :mod:`meshmode.array_context` that
+# reuse a single context and queue per device for the whole test session, so
+# that pyopencl's in-memory caches of built programs (which are keyed on the
+# context) survive from one test to the next.
+_CONTEXT_AND_QUEUE_CACHE = {}
+
+
+class _SessionCommandQueueMixin:
+    def get_command_queue(self):
+        # Get rid of leftovers from past tests. The context-keyed caches are
+        # deliberately left alone (cf. the upstream implementation), as
+        # preserving them is the point of sharing the context.
+        from gc import collect
+        collect()
+
+        try:
+            return _CONTEXT_AND_QUEUE_CACHE[self.device]
+        except KeyError:
+            pass
+
+        import pyopencl as cl
+        ctx = cl.Context([self.device])
+        result = ctx, cl.CommandQueue(ctx)
+
+        _CONTEXT_AND_QUEUE_CACHE[self.device] = result
+        return result
+
+
+class PytestPyOpenCLArrayContextFactory(
+        _SessionCommandQueueMixin,
+        _mactx.PytestPyOpenCLArrayContextFactory):
+    pass
+
+
+class PytestPytatoPyOpenCLArrayContextFactory(
+        _SessionCommandQueueMixin,
+        _mactx.PytestPytatoPyOpenCLArrayContextFactory):
+    pass
+
+# }}}
+
+
+# {{{ gmsh meshes
+
+def generate_gmsh_mesh(src_file, dim, order, h):
+    from meshmode.mesh.io import generate_gmsh, FileSource
+    return generate_gmsh(
+            FileSource(src_file), dim, order=order,
+            force_ambient_dim=dim,
+            other_options=[
+                "-string", "Mesh.CharacteristicLengthMax = %g;" % h],
+            target_unit="MM",
+            )
+
+
+# Only meant for call sites that request the same (small) mesh repeatedly,
+# e.g. from several parametrizations of a test. The bound keeps the cache from
+# holding on to more than a handful of meshes for the whole session.
+cached_generate_gmsh_mesh = lru_cache(maxsize=8)(generate_gmsh_mesh)
+
+# }}}
+
+# vim: fdm=marker